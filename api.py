@@ -0,0 +1,325 @@
+from collections import OrderedDict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pymongo.mongo_client import MongoClient
+from pymongo.server_api import ServerApi
+import matplotlib
+import argparse
+import hashlib
+import threading
+import json
+import time
+import os
+
+# Charts are rendered on the server's worker threads, where a GUI backend would fail,
+# so pin the non-interactive backend before stats imports pyplot
+matplotlib.use('Agg')
+
+from utils import format_time, get_current_nyt_mini_timestamp
+from stats import get_wins_data, get_weekday_wins_data, render_bar_chart, render_pie_charts
+from versions import get_data_version
+
+if not os.getenv('GITHUB_ACTIONS'):
+    # Code is running locally
+    from dotenv import load_dotenv
+    load_dotenv()
+
+DAYS_OF_THE_WEEK = ['Monday', 'Tuesday', 'Wednesday',
+                    'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Number of rendered responses kept in memory
+CACHE_SIZE = 32
+
+# How long the data version is trusted before asking MongoDB again, in seconds
+VERSION_TTL = 10
+
+# Matplotlib's pyplot is not thread-safe, so charts are rendered one at a time
+_render_lock = threading.Lock()
+
+
+class LRUCache:
+    """
+    A thread-safe cache that evicts the least recently used entry once full.
+    """
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def get_standings(db) -> dict:
+    """
+    Retrieves the standing of the NYT Mini puzzle currently on the leaderboard.
+    """
+    puzzle_date = get_current_nyt_mini_timestamp()
+    times_doc = db['times'].find_one(
+        {'timestamp': datetime.fromisoformat(str(puzzle_date))}) or {}
+
+    # Sort the entries by their times
+    sorted_times = sorted(times_doc.get('entries', {}).items(),
+                          key=lambda x: x[1])
+
+    return {
+        'timestamp': puzzle_date.isoformat(),
+        'weekday': DAYS_OF_THE_WEEK[puzzle_date.weekday()],
+        'standings': [
+            {'place': place, 'username': username,
+             'time': time, 'formatted_time': format_time(time)}
+            for place, (username, time) in enumerate(sorted_times, start=1)
+        ]
+    }
+
+
+def get_winners(db) -> list:
+    """
+    Retrieves the all-time wins of every user, most wins first.
+    """
+    return [
+        {'username': doc['username'], 'wins': doc.get('wins', 0),
+         'win_streak': doc.get('win_streak', 0)}
+        for doc in db['winners'].find().sort('wins', -1)
+    ]
+
+
+def get_streaks(db) -> list:
+    """
+    Retrieves the current win streak of every user, longest first.
+    """
+    return [
+        {'username': doc['username'], 'win_streak': doc.get('win_streak', 0)}
+        for doc in db['winners'].find().sort('win_streak', -1)
+    ]
+
+
+def get_weekdays(db) -> dict:
+    """
+    Retrieves the wins of every user on each day of the week.
+    """
+    data, _ = get_weekday_wins_data(db)
+    return data
+
+
+def get_wins_chart(db) -> tuple:
+    usernames, wins = get_wins_data(db)
+    with _render_lock:
+        return render_bar_chart(wins, usernames)
+
+
+def get_weekdays_chart(db) -> tuple:
+    data, colors = get_weekday_wins_data(db)
+    with _render_lock:
+        return render_pie_charts(data, colors)
+
+
+# Paths served as JSON
+JSON_ROUTES = {
+    '/standings': get_standings,
+    '/winners': get_winners,
+    '/streaks': get_streaks,
+    '/weekdays': get_weekdays,
+}
+
+# Paths served as chart images
+CHART_ROUTES = {
+    '/charts/wins': get_wins_chart,
+    '/charts/weekdays': get_weekdays_chart,
+}
+
+
+def etag_matches(if_none_match, etag) -> bool:
+    """
+    Checks an If-None-Match header against an ETag, using weak comparison.
+
+    Args:
+        if_none_match (str): The raw header value, a comma-separated list of tags or '*'.
+        etag (str): The current ETag of the resource.
+
+    Returns:
+        bool: Whether the client already has the current version.
+    """
+    if not if_none_match:
+        return False
+
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag == '*':
+            return True
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+
+    return False
+
+
+class StatsAPI:
+    """
+    Builds the responses of the stats API, caching them until the data changes.
+
+    Args:
+        db (Database): The MongoDB database holding the stats.
+        cache_size (int): The number of responses to keep in memory.
+        version_ttl (float): How long the data version is trusted, in seconds.
+    """
+
+    def __init__(self, db, cache_size=CACHE_SIZE, version_ttl=VERSION_TTL):
+        self.db = db
+        self.cache = LRUCache(cache_size)
+        self.version_ttl = version_ttl
+        self._version = None
+        self._version_checked_at = 0
+        self._version_lock = threading.Lock()
+
+    def get_version(self) -> str:
+        """
+        Returns the current version of the data, clearing the cache when it changes.
+
+        The puzzle date is part of the version since the current standing and the
+        weekday wins change when a new puzzle is released, even without any writes.
+        """
+        with self._version_lock:
+            now = time.monotonic()
+            if self._version is None or now - self._version_checked_at >= self.version_ttl:
+                version = f'{get_data_version(self.db)}.{get_current_nyt_mini_timestamp()}'
+                if version != self._version:
+                    self.cache.clear()
+                    self._version = version
+                self._version_checked_at = now
+
+            return self._version
+
+    def get_etag(self, path, version) -> str:
+        """
+        Returns the ETag of a path, which only depends on the version of the data.
+        """
+        version_hash = hashlib.sha1(f'{path}:{version}'.encode()).hexdigest()
+        return f'"{version_hash[:16]}"'
+
+    def get_response(self, path, version) -> tuple:
+        """
+        Builds the response for a path.
+
+        Args:
+            path (str): The path requested.
+            version (str): The version of the data the response is built from.
+
+        Raises:
+            KeyError: If the path is not served by the API.
+
+        Returns:
+            tuple: A tuple containing the response body and its content type.
+        """
+        key = (path, version)
+        response = self.cache.get(key)
+        if response is not None:
+            return response
+
+        if path in JSON_ROUTES:
+            body = json.dumps(JSON_ROUTES[path](self.db)).encode()
+            response = body, 'application/json'
+        else:
+            _, image, content_type = CHART_ROUTES[path](self.db)
+            response = image, content_type
+
+        self.cache.put(key, response)
+        return response
+
+
+class StatsRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves the stats API, answering conditional requests with 304 Not Modified.
+    """
+
+    def do_GET(self):
+        self.respond(include_body=True)
+
+    def do_HEAD(self):
+        self.respond(include_body=False)
+
+    def respond(self, include_body):
+        api = self.server.api
+        path = self.path.split('?', 1)[0].rstrip('/') or '/'
+
+        if path not in JSON_ROUTES and path not in CHART_ROUTES:
+            self.send_json_error(404, 'Not found', include_body)
+            return
+
+        try:
+            version = api.get_version()
+            etag = api.get_etag(path, version)
+            if etag_matches(self.headers.get('If-None-Match'), etag):
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+
+            body, content_type = api.get_response(path, version)
+        except Exception as e:
+            self.log_error('Failed to build %s: %r', path, e)
+            self.send_json_error(500, 'Internal server error', include_body)
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        if include_body:
+            self.wfile.write(body)
+
+    def send_json_error(self, status, message, include_body=True):
+        body = json.dumps({'error': message}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if include_body:
+            self.wfile.write(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Serve NYT Mini stats as a read-only HTTP API.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+
+    uri = os.environ.get('MONGO_URI')
+
+    # Create a new client and connect to the server
+    client = MongoClient(uri, server_api=ServerApi('1'))
+    try:
+        db = client.get_database('nyt-mini-times-cluster')
+
+        server = ThreadingHTTPServer((args.host, args.port), StatsRequestHandler)
+        server.api = StatsAPI(db)
+        print(f"Serving stats on http://{args.host}:{args.port}")
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
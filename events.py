@@ -0,0 +1,113 @@
+from datetime import datetime, timezone
+
+# Collection holding the append-only log of observed solves
+SOLVE_EVENTS_COLLECTION = 'solve_events'
+
+# Databases whose event log index has been ensured by this process
+_indexed_databases = set()
+
+
+def ensure_solve_events_index(db) -> None:
+    """
+    Creates the index the event log is read and written through, once per process.
+
+    Args:
+        db (Database): The MongoDB database holding the event log.
+
+    Returns:
+        None
+    """
+    if db.name in _indexed_databases:
+        return
+
+    db[SOLVE_EVENTS_COLLECTION].create_index(
+        [('timestamp', 1), ('bucket', 1)], unique=True)
+    _indexed_databases.add(db.name)
+
+
+def get_solve_events(db, timestamp) -> list:
+    """
+    Retrieves every logged solve for a puzzle, oldest first.
+
+    Args:
+        db (Database): The MongoDB database holding the event log.
+        timestamp (datetime): The date of the puzzle.
+
+    Returns:
+        list: A list of event dictionaries with 'username', 'time' and 'first_seen' keys.
+    """
+    ensure_solve_events_index(db)
+
+    # Only the day's buckets are read, through the (timestamp, bucket) index
+    buckets = db[SOLVE_EVENTS_COLLECTION].find(
+        {'timestamp': timestamp}, {'_id': 0, 'events': 1}).sort('bucket', 1)
+
+    events = []
+    for bucket in buckets:
+        events.extend(bucket['events'])
+
+    return events
+
+
+def get_logged_entries(db, timestamp) -> dict:
+    """
+    Derives the entries map of a `times` document from the event log.
+
+    Args:
+        db (Database): The MongoDB database holding the event log.
+        timestamp (datetime): The date of the puzzle.
+
+    Returns:
+        dict: A dictionary mapping usernames to the first completion time seen for them.
+    """
+    entries = {}
+    for event in get_solve_events(db, timestamp):
+        # A solve is only logged once, but keep the earliest sighting to be safe
+        entries.setdefault(event['username'], event['time'])
+
+    return entries
+
+
+def log_solve_events(db, timestamp, entries, seen_at=None) -> tuple:
+    """
+    Appends any solves not already in the event log to the bucket for the current hour.
+
+    New solves are found by diffing against the log itself, so a solve is written
+    once even if a later write that depends on it fails and the run is retried.
+
+    Args:
+        db (Database): The MongoDB database holding the event log.
+        timestamp (datetime): The date of the puzzle.
+        entries (dict): A dictionary mapping usernames to completion times in seconds.
+        seen_at (datetime): When the entries were observed, defaults to now (UTC).
+
+    Returns:
+        tuple: A tuple containing every logged entry for the puzzle and a dictionary
+        of the entries that were newly logged.
+    """
+    logged_entries = get_logged_entries(db, timestamp)
+    new_entries = {k: v for k, v in entries.items()
+                   if k not in logged_entries}
+
+    if not new_entries:
+        return logged_entries, new_entries
+
+    if seen_at is None:
+        # Stored naive, as pymongo reads datetimes back as naive UTC
+        seen_at = datetime.now(timezone.utc).replace(tzinfo=None)
+
+    events = [{'username': username, 'time': time, 'first_seen': seen_at}
+              for username, time in new_entries.items()]
+
+    # Push every new event into the hour's bucket, creating it if needed
+    bucket = seen_at.replace(minute=0, second=0, microsecond=0)
+    db[SOLVE_EVENTS_COLLECTION].update_one(
+        {'timestamp': timestamp, 'bucket': bucket},
+        {'$push': {'events': {'$each': events}},
+         '$inc': {'count': len(events)}},
+        upsert=True)
+    print(f"Logged {len(events)} new solve events for {timestamp}")
+
+    logged_entries.update(new_entries)
+
+    return logged_entries, new_entries
@@ -0,0 +1,276 @@
+from pymongo.mongo_client import MongoClient
+from pymongo.server_api import ServerApi
+from pymongo import errors, UpdateOne
+import numpy as np
+import argparse
+import zipfile
+import re
+import os
+
+from versions import bump_data_version
+
+if not os.getenv('GITHUB_ACTIONS'):
+    # Code is running locally
+    from dotenv import load_dotenv
+    load_dotenv()
+
+# Number of documents read or written per round trip, and per chunk of the archive
+BATCH_SIZE = 1000
+
+# Version of the archive layout, bumped on incompatible changes
+FORMAT_VERSION = 1
+
+CHUNK_PATTERN = re.compile(r'^times_(\d+)_timestamps$')
+
+# The archive is an NPZ file (a zip of .npy arrays) that can also be opened with np.load:
+#   format.npy                    layout version
+#   users.npy                     dictionary of every username, indexed by the other arrays
+#   times_<n>_timestamps.npy      date of each times document in chunk n
+#   times_<n>_weekdays.npy        weekday of each document
+#   times_<n>_counts.npy          number of entries of each document
+#   times_<n>_users.npy           user index of each entry, documents one after another
+#   times_<n>_seconds.npy         completion time of each entry in seconds
+#   winners_users.npy             user index of each winners document
+#   winners_wins.npy              wins of each user
+#   winners_streaks.npy           current win streak of each user
+
+
+def write_array(archive, name, array) -> None:
+    """
+    Writes a single array into the archive as a .npy member.
+    """
+    with archive.open(f'{name}.npy', 'w', force_zip64=True) as f:
+        np.lib.format.write_array(f, np.asarray(array), allow_pickle=False)
+
+
+def compact_seconds(seconds) -> np.ndarray:
+    """
+    Stores completion times as int16 unless one of them does not fit.
+    """
+    array = np.asarray(seconds, dtype=np.int32)
+    if array.size == 0 or array.max() <= np.iinfo(np.int16).max:
+        return array.astype(np.int16)
+    return array
+
+
+def get_user_index(user_ids, username) -> int:
+    """
+    Looks up a username in the dictionary, adding it if it is new.
+    """
+    if username not in user_ids:
+        if len(user_ids) > np.iinfo(np.uint16).max:
+            raise ValueError(f'Too many users to export: {len(user_ids) + 1}')
+        user_ids[username] = len(user_ids)
+    return user_ids[username]
+
+
+def export_history(db, path, batch_size=BATCH_SIZE) -> None:
+    """
+    Streams the `times` and `winners` collections into a compact columnar archive.
+
+    Documents are read in batches and each batch is written out as its own chunk,
+    so memory use is bounded by the batch size and the number of users.
+
+    Args:
+        db (Database): The MongoDB database to export.
+        path (str): The path of the archive to write.
+        batch_size (int): The number of documents per batch and per chunk.
+
+    Raises:
+        errors.ConnectionFailure: if there is a failure connecting to the MongoDB database
+        errors.OperationFailure: if there is an error performing the MongoDB operations
+
+    Returns:
+        None
+    """
+    user_ids = {}
+
+    def write_chunk(archive, chunk, docs):
+        timestamps, weekdays, counts, users, seconds = [], [], [], [], []
+        for doc in docs:
+            entries = doc.get('entries', {})
+            timestamps.append(np.datetime64(doc['timestamp'], 'D'))
+            weekdays.append(doc['weekday'])
+            counts.append(len(entries))
+            for username, time in entries.items():
+                users.append(get_user_index(user_ids, username))
+                seconds.append(time)
+
+        prefix = f'times_{chunk:05d}'
+        write_array(archive, f'{prefix}_timestamps',
+                    np.array(timestamps, dtype='datetime64[D]'))
+        write_array(archive, f'{prefix}_weekdays',
+                    np.array(weekdays, dtype=np.int8))
+        write_array(archive, f'{prefix}_counts',
+                    np.array(counts, dtype=np.int16))
+        write_array(archive, f'{prefix}_users',
+                    np.array(users, dtype=np.uint16))
+        write_array(archive, f'{prefix}_seconds', compact_seconds(seconds))
+
+    try:
+        with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            write_array(archive, 'format', np.int16(FORMAT_VERSION))
+
+            # Stream the times collection, writing a chunk per batch
+            cursor = db['times'].find(
+                {}, {'_id': 0, 'timestamp': 1, 'weekday': 1, 'entries': 1}
+            ).sort('timestamp', 1).batch_size(batch_size)
+
+            chunk = 0
+            docs = []
+            total = 0
+            for doc in cursor:
+                docs.append(doc)
+                if len(docs) == batch_size:
+                    write_chunk(archive, chunk, docs)
+                    total += len(docs)
+                    chunk += 1
+                    docs = []
+            if docs:
+                write_chunk(archive, chunk, docs)
+                total += len(docs)
+
+            # The winners collection only has a document per user
+            winners_users, winners_wins, winners_streaks = [], [], []
+            for doc in db['winners'].find({}, {'_id': 0}).batch_size(batch_size):
+                winners_users.append(get_user_index(user_ids, doc['username']))
+                winners_wins.append(doc.get('wins', 0))
+                winners_streaks.append(doc.get('win_streak', 0))
+
+            write_array(archive, 'winners_users',
+                        np.array(winners_users, dtype=np.uint16))
+            write_array(archive, 'winners_wins',
+                        np.array(winners_wins, dtype=np.int32))
+            write_array(archive, 'winners_streaks',
+                        np.array(winners_streaks, dtype=np.int32))
+
+            # The dictionary is only complete once every document has been read
+            write_array(archive, 'users', np.array(list(user_ids), dtype=str))
+
+        print(
+            f"Exported {total} times documents and {len(winners_users)} winners to {path}")
+
+    except errors.ConnectionFailure as e:
+        raise e
+    except errors.OperationFailure as e:
+        raise e
+
+
+def import_history(db, path, batch_size=BATCH_SIZE, drop=False) -> None:
+    """
+    Loads an archive written by `export_history` back into the database.
+
+    Chunks are read one at a time and written with batched upserts keyed on the
+    timestamp and username, or with batched inserts into emptied collections.
+
+    Args:
+        db (Database): The MongoDB database to import into.
+        path (str): The path of the archive to read.
+        batch_size (int): The number of documents written per round trip.
+        drop (bool): Whether to empty the `times` and `winners` collections first.
+
+    Raises:
+        ValueError: If the archive was written with an unsupported layout.
+        errors.ConnectionFailure: if there is a failure connecting to the MongoDB database
+        errors.OperationFailure: if there is an error performing the MongoDB operations
+
+    Returns:
+        None
+    """
+    def write_batches(collection, docs, key):
+        for start in range(0, len(docs), batch_size):
+            batch = docs[start:start + batch_size]
+            if drop:
+                collection.insert_many(batch, ordered=False)
+            else:
+                collection.bulk_write([
+                    UpdateOne({key: doc[key]}, {'$set': doc}, upsert=True)
+                    for doc in batch
+                ], ordered=False)
+
+    try:
+        with np.load(path, allow_pickle=False) as archive:
+            if int(archive['format']) != FORMAT_VERSION:
+                raise ValueError(
+                    f"Unsupported history format {int(archive['format'])}")
+
+            usernames = archive['users'].tolist()
+
+            if drop:
+                db['times'].delete_many({})
+                db['winners'].delete_many({})
+
+            chunks = sorted(int(match.group(1)) for match in map(
+                CHUNK_PATTERN.match, archive.files) if match)
+
+            total = 0
+            for chunk in chunks:
+                prefix = f'times_{chunk:05d}'
+                timestamps = archive[f'{prefix}_timestamps'].astype(
+                    'datetime64[ms]').tolist()
+                weekdays = archive[f'{prefix}_weekdays'].tolist()
+                counts = archive[f'{prefix}_counts']
+                users = archive[f'{prefix}_users'].tolist()
+                seconds = archive[f'{prefix}_seconds'].tolist()
+
+                # Split the flat entry columns back into a map per document
+                docs = []
+                offsets = np.concatenate(([0], np.cumsum(counts))).tolist()
+                for i, timestamp in enumerate(timestamps):
+                    entries = {usernames[users[j]]: seconds[j]
+                               for j in range(offsets[i], offsets[i + 1])}
+                    docs.append({
+                        'timestamp': timestamp,
+                        'weekday': weekdays[i],
+                        'entries': entries
+                    })
+
+                write_batches(db['times'], docs, 'timestamp')
+                total += len(docs)
+
+            winners = [
+                {'username': usernames[user], 'wins': wins, 'win_streak': streak}
+                for user, wins, streak in zip(
+                    archive['winners_users'].tolist(),
+                    archive['winners_wins'].tolist(),
+                    archive['winners_streaks'].tolist())
+            ]
+            write_batches(db['winners'], winners, 'username')
+
+        bump_data_version(db, 'times')
+        bump_data_version(db, 'winners')
+        print(
+            f"Imported {total} times documents and {len(winners)} winners from {path}")
+
+    except errors.ConnectionFailure as e:
+        raise e
+    except errors.OperationFailure as e:
+        raise e
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Export or import the NYT Mini history as a compact columnar archive.')
+    parser.add_argument('command', choices=['export', 'import'])
+    parser.add_argument('path', help='path of the .npz archive')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--drop', action='store_true',
+                        help='empty the collections before importing')
+    args = parser.parse_args()
+
+    uri = os.environ.get('MONGO_URI')
+
+    # Create a new client and connect to the server
+    client = MongoClient(uri, server_api=ServerApi('1'))
+    try:
+        db = client.get_database('nyt-mini-times-cluster')
+        if args.command == 'export':
+            export_history(db, args.path, args.batch_size)
+        else:
+            import_history(db, args.path, args.batch_size, args.drop)
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+import requests
+from bs4 import BeautifulSoup as soup
+import calendar
+
+from utils import get_current_nyt_mini_timestamp
+
+# Headers used by the iOS crossword client, which the JSON API expects
+IOS_HEADERS = {
+    'User-Agent': 'Crosswords/20191213190708 CFNetwork/1128.0.1 Darwin/19.6.0',
+    'client_id': 'ios.crosswords',
+}
+
+
+class LeaderboardSource(ABC):
+    """
+    Base class for a place the NYT Mini leaderboard can be read from.
+
+    Subclasses must implement `fetch`, returning the same `(timestamp, weekday, entries)`
+    tuple regardless of where the data came from.
+    """
+
+    name = 'base'
+
+    @abstractmethod
+    def fetch(self, cookie: str) -> tuple:
+        """
+        Fetches the current leaderboard.
+
+        Args:
+            cookie (str): NYT-S cookie needed to access the leaderboard.
+
+        Returns:
+            tuple: A tuple containing the date, weekday, and a dictionary of usernames
+            and completion times in seconds.
+        """
+
+
+class JsonLeaderboardSource(LeaderboardSource):
+    """
+    Reads the compact leaderboard payload served to the iOS crossword client.
+    """
+
+    name = 'json'
+    url = 'https://www.nytimes.com/svc/crosswords/v6/leaderboard/private/mini/{date}.json'
+
+    def fetch(self, cookie: str) -> tuple:
+        puzzle_date = get_current_nyt_mini_timestamp()
+
+        # Request only the leaderboard payload for the current puzzle
+        response = requests.get(
+            self.url.format(date=puzzle_date.isoformat()),
+            headers=dict(IOS_HEADERS, **{'nyt-s': cookie}),
+        )
+        response.raise_for_status()
+        payload = response.json()
+
+        # Prefer the date reported by the API over the one we computed
+        timestamp = datetime.fromisoformat(
+            payload.get('printDate', puzzle_date.isoformat()))
+
+        # Extract the completion times and usernames
+        entries = {}
+        for solver in payload['data']:
+            score = solver.get('score')
+            if not score or 'secondsSpentSolving' not in score:
+                # Ignore any solvers without completion times
+                continue
+
+            name = solver['name'].strip()
+            if name.endswith('(you)'):
+                name = name.replace('(you)', '').strip()
+
+            entries.update({name: int(score['secondsSpentSolving'])})
+
+        return timestamp, timestamp.weekday(), entries
+
+
+# Modified from: https://github.com/pjflanagan/nyt-crossword-plus/blob/main/scrape/main.py
+
+
+class HtmlLeaderboardSource(LeaderboardSource):
+    """
+    Scrapes the full leaderboards web page.
+    """
+
+    name = 'html'
+    url = 'https://www.nytimes.com/puzzles/leaderboards'
+
+    def fetch(self, cookie: str) -> tuple:
+        # Request the leaderboard page with the NYT-S cookie
+        response = requests.get(self.url, cookies={'NYT-S': cookie})
+        response.raise_for_status()
+
+        # Parse the page with BeautifulSoup
+        page = soup(response.content, features='html.parser')
+
+        # Extract the date from the page
+        solvers = page.find_all('div', class_='lbd-score')
+        [_, month, day, year] = page.find(
+            'h3', class_='lbd-type__date').text.strip().split()
+
+        # Format the date and get the weekday
+        day = day.replace(",", "")
+        month_number = list(calendar.month_name).index(month)
+        month_string = f'{month_number:02d}'
+        day_string = f'{int(day):02d}'
+        timestamp = year + '-' + month_string + '-' + day_string
+        weekday = calendar.weekday(int(year), int(month_number), int(day))
+
+        # Extract the completion times and usernames
+        entries = {}
+        for solver in solvers:
+            name = solver.find('p', class_='lbd-score__name').text.strip()
+            try:
+                parsed_time = solver.find(
+                    'p', class_='lbd-score__time').text.strip()
+
+                if parsed_time != '--':
+                    minutes, seconds = parsed_time.split(':')
+                    time = (60 * int(minutes)) + int(seconds)
+
+                    if name.endswith('(you)'):
+                        name = name.replace('(you)', '').strip()
+
+                    entries.update({name: time})
+            except:
+                # Ignore any solvers without completion times
+                pass
+
+        # Return the date, weekday, and completion times dictionary
+        return datetime.fromisoformat(timestamp), weekday, entries
+
+
+# Sources are tried in order until one of them succeeds
+DEFAULT_SOURCES = (JsonLeaderboardSource(), HtmlLeaderboardSource())
+
+
+def fetch_leaderboard(cookie: str, sources=DEFAULT_SOURCES) -> tuple:
+    """
+    Fetches the leaderboard from the first source that succeeds.
+
+    Args:
+        cookie (str): NYT-S cookie needed to access the leaderboard.
+        sources (iterable): The `LeaderboardSource` objects to try, in order.
+
+    Raises:
+        Exception: The error raised by the last source if every source fails.
+
+    Returns:
+        tuple: A tuple containing the date, weekday, and a dictionary of usernames
+        and completion times in seconds.
+    """
+    error = None
+    for source in sources:
+        try:
+            return source.fetch(cookie)
+        except (requests.exceptions.RequestException, ValueError,
+                KeyError, TypeError, AttributeError) as e:
+            # Fall back to the next source
+            print(f"Leaderboard source '{source.name}' failed: {e!r}")
+            error = e
+
+    if error is None:
+        raise ValueError('No leaderboard sources given')
+    raise error
@@ -1,4 +1,5 @@
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import requests
 from pymongo.mongo_client import MongoClient
 from pymongo.server_api import ServerApi
@@ -6,7 +7,8 @@ from pymongo import errors
 import os
 
 from utils import format_time, get_previous_nyt_mini_timestamp
-from stats import get_wins_data, post_pie_charts_to_discord_webhook, post_bar_chart_to_discord_webhook
+from versions import bump_data_version
+from stats import get_weekday_wins_data, render_bar_chart, render_pie_charts, post_report_to_discord_webhook
 
 DAYS_OF_THE_WEEK = ['Monday', 'Tuesday', 'Wednesday',
                     'Thursday', 'Friday', 'Saturday', 'Sunday']
@@ -17,12 +19,13 @@ if not os.getenv('GITHUB_ACTIONS'):
     load_dotenv()
 
 
-def update_winners_collection(timestamp) -> tuple:
+def update_winners_collection(timestamp, db) -> tuple:
     """
     Updates the "winners" collection in the MongoDB database with the winner of the NYT Mini puzzle for the given timestamp.
 
     Args:
         timestamp: datetime object representing the timestamp of the puzzle for which to update the winners collection
+        db: the MongoDB database holding the "times" and "winners" collections
 
     Raises:
         errors.ConnectionFailure: if there is a failure connecting to the MongoDB database
@@ -35,11 +38,6 @@ def update_winners_collection(timestamp) -> tuple:
         existing_doc['weekday'] (str): an integer representing the day of the week (Monday=0, Sunday=6) for the given timestamp
     """
     try:
-        uri = os.environ.get('MONGO_URI')
-
-        # Create a new client and connect to the server
-        client = MongoClient(uri, server_api=ServerApi('1'))
-        db = client.get_database('nyt-mini-times-cluster')
         times = db['times']
         # Check if a document with the given timestamp already exists
         existing_doc = times.find_one(
@@ -62,6 +60,7 @@ def update_winners_collection(timestamp) -> tuple:
         # set all other users' win streaks to 0
         winners.update_many({"username": {"$ne": winner}},
                             {"$set": {"win_streak": 0}})
+        bump_data_version(db, 'winners')
 
         # return the updated documents, winner username, the final times from the day, and the weekday
         res = winners.find().sort(
@@ -78,19 +77,19 @@ def update_winners_collection(timestamp) -> tuple:
         raise e
     except Exception as e:
         raise e
-    finally:
-        client.close()
 
 
-def post_final_standing_to_discord_webhook(all_winners_docs, winner, times_doc, weekday):
+def post_final_standing_to_discord_webhook(all_winners_docs, winner, times_doc, weekday, charts):
     """
-    Posts the final standing for the NYT mini puzzle to a Discord webhook.
+    Posts the final standing for the NYT mini puzzle to a Discord webhook, along with
+    the rendered charts, in a single request.
 
     Args:
         all_winners_docs (list): A list of dictionaries containing the winner information.
         winner (str): The username of the winner.
         times_doc (dict): A dictionary containing the times information.
         weekday (int): The integer representation of the weekday (0-6).
+        charts (list): A list of (file name, image, content type) tuples to attach, in order.
 
     Raises:
         requests.exceptions.RequestException: If there is an error in the POST request to the webhook.
@@ -98,8 +97,6 @@ def post_final_standing_to_discord_webhook(all_winners_docs, winner, times_doc,
     Returns: 
         None
     """
-    webhook_url = os.environ.get('DISCORD_WEBHOOK')
-
     # Sort the times dictionary by the values (i.e., the times)
     sorted_times = dict(
         sorted(times_doc['entries'].items(), key=lambda x: x[1]))
@@ -130,13 +127,8 @@ def post_final_standing_to_discord_webhook(all_winners_docs, winner, times_doc,
                 'description': standing_str
             }]
         }
-        # Send the POST request to the webhook URL
-        response = requests.post(webhook_url, json=data)
-        usernames, wins = get_wins_data()
-        post_bar_chart_to_discord_webhook(wins, usernames)
-        post_pie_charts_to_discord_webhook()
-        # Check the response status code and raise an error if it indicates a failure
-        response.raise_for_status()
+        # Send the report and charts to the webhook in a single request
+        post_report_to_discord_webhook(data, charts)
     except requests.exceptions.RequestException as e:
         raise e
     except Exception as e:
@@ -149,16 +141,42 @@ def main():
     # Print the timestamp to the console for debugging purposes
     print(f"Previous puzzle: {str(current_nyt_mini_timestamp)}")
 
-    try:
-        # Update the winners collection with the latest puzzle times
-        all_winners_docs, winner, times_doc, weekday = update_winners_collection(
-            current_nyt_mini_timestamp)
-        # Post the final standings to a Discord webhook
-        post_final_standing_to_discord_webhook(
-            all_winners_docs, winner, times_doc, weekday)
-
-    except Exception as e:
-        raise e
-
+    # The database work runs on threads sharing a single client, while each chart is
+    # rendered on the main thread as soon as its data is in
+    with ThreadPoolExecutor(max_workers=2) as fetch_pool:
+        uri = os.environ.get('MONGO_URI')
 
-main()
+        # Create a new client and connect to the server
+        client = MongoClient(uri, server_api=ServerApi('1'))
+        try:
+            db = client.get_database('nyt-mini-times-cluster')
+
+            # Settling the winner and counting the weekday wins are independent
+            winners_future = fetch_pool.submit(
+                update_winners_collection, current_nyt_mini_timestamp, db)
+            weekday_future = fetch_pool.submit(get_weekday_wins_data, db)
+
+            for future in as_completed([winners_future, weekday_future]):
+                if future is weekday_future:
+                    weekday_data, colors = future.result()
+                    pie_chart = render_pie_charts(weekday_data, colors)
+                else:
+                    # The updated winners already hold everyone's total wins
+                    all_winners_docs, winner, times_doc, weekday = future.result()
+                    bar_chart = render_bar_chart(
+                        [w['wins'] for w in all_winners_docs],
+                        [w['username'] for w in all_winners_docs])
+
+            # Post the final standings to a Discord webhook, with the charts in a fixed order
+            post_final_standing_to_discord_webhook(
+                all_winners_docs, winner, times_doc, weekday,
+                [bar_chart, pie_chart])
+
+        except Exception as e:
+            raise e
+        finally:
+            client.close()
+
+
+if __name__ == "__main__":
+    main()
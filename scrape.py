@@ -1,13 +1,13 @@
-from datetime import datetime
 import requests
-from bs4 import BeautifulSoup as soup
-import calendar
 from pymongo.mongo_client import MongoClient
 from pymongo.server_api import ServerApi
 from pymongo import errors
 import os
 
-from utils import format_time
+from utils import format_time, get_webhook_message_url
+from leaderboard import fetch_leaderboard
+from events import log_solve_events
+from versions import bump_data_version
 
 if not os.getenv('GITHUB_ACTIONS'):
     # Code is running locally
@@ -59,15 +59,15 @@ def get_cookie(username: str, password: str) -> str:
     # Raise an exception if the 'NYT-S' cookie was not found.
     raise ValueError('NYT-S cookie not found')
 
-# Modified from: https://github.com/pjflanagan/nyt-crossword-plus/blob/main/scrape/main.py
-
-
 def scrape_leaderboard(cookie: str) -> tuple:
     """
-    Scrapes the leaderboard for the NYT crossword puzzle and returns a tuple
+    Fetches the leaderboard for the NYT crossword puzzle and returns a tuple
     containing the date, weekday, and a dictionary of usernames and completion
     times in seconds.
 
+    The compact JSON API is tried first, falling back to scraping the HTML
+    leaderboards page if it fails.
+
     Args:
         cookie (str): NYT-S cookie needed to access the leaderboard.
 
@@ -75,54 +75,13 @@ def scrape_leaderboard(cookie: str) -> tuple:
         tuple: A tuple containing the date, weekday, and a dictionary of usernames
         and completion times in seconds.
     """
-
-    # Request the leaderboard page with the NYT-S cookie
-    url = 'https://www.nytimes.com/puzzles/leaderboards'
-    response = requests.get(url, cookies={'NYT-S': cookie})
-
-    # Parse the page with BeautifulSoup
-    page = soup(response.content, features='html.parser')
-
-    # Extract the date from the page
-    solvers = page.find_all('div', class_='lbd-score')
-    [_, month, day, year] = page.find(
-        'h3', class_='lbd-type__date').text.strip().split()
-
-    # Format the date and get the weekday
-    day = day.replace(",", "")
-    month_number = list(calendar.month_name).index(month)
-    month_string = f'{month_number:02d}'
-    day_string = f'{int(day):02d}'
-    timestamp = year + '-' + month_string + '-' + day_string
-    weekday = calendar.weekday(int(year), int(month_number), int(day))
-
-    # Extract the completion times and usernames
-    entries = {}
-    for solver in solvers:
-        name = solver.find('p', class_='lbd-score__name').text.strip()
-        try:
-            parsed_time = solver.find(
-                'p', class_='lbd-score__time').text.strip()
-
-            if parsed_time != '--':
-                minutes, seconds = parsed_time.split(':')
-                time = (60 * int(minutes)) + int(seconds)
-
-                if name.endswith('(you)'):
-                    name = name.replace('(you)', '').strip()
-
-                entries.update({name: time})
-        except:
-            # Ignore any solvers without completion times
-            pass
-
-    # Return the date, weekday, and completion times dictionary
-    return datetime.fromisoformat(timestamp), weekday, entries
+    return fetch_leaderboard(cookie)
 
 
 def enter_times_in_db(timestamp, weekday, entries) -> tuple:
     """
-    Inserts or updates a document with the given timestamp and entries in the MongoDB collection.
+    Appends newly observed solves to the solve event log and derives the document with
+    the given timestamp in the MongoDB collection from it.
 
     Args:
         timestamp (str): The timestamp of the document in ISO format (YYYY-MM-DD).
@@ -144,32 +103,42 @@ def enter_times_in_db(timestamp, weekday, entries) -> tuple:
         db = client.get_database('nyt-mini-times-cluster')
         times = db['times']
 
+        # Append the solves the event log has not seen yet, and derive the entries from it
+        logged_entries, _ = log_solve_events(db, timestamp, entries)
+
         # Check if a document with the given timestamp already exists
         existing_doc = times.find_one({'timestamp': timestamp})
 
         if existing_doc is None:
-            # Create a new document with all the passed-in values
+            # Create a new document from the event log
             new_doc = {
                 'weekday': weekday,
                 'timestamp': timestamp,
-                'entries': entries
+                'entries': logged_entries
             }
             times.insert_one(new_doc)
-            print(f"Inserted new document with entries {entries}")
-            return new_doc, entries
+            bump_data_version(db, 'times')
+            print(f"Inserted new document with entries {logged_entries}")
+            return new_doc, logged_entries
         else:
-            # Check if the passed-in entries is different from the current entries object in the database
+            # Logged solves missing from the document are new, which also covers a
+            # previous run that logged solves but failed to update the document
             doc_entries = dict(existing_doc['entries'])
-            if entries != doc_entries:
-                # Update the entries field with the passed-in entries
-                times.update_one({'timestamp': timestamp}, {
-                                 '$set': {'entries': entries}})
+            new_times = {k: v for k, v in logged_entries.items()
+                         if k not in doc_entries.keys()}
+            if new_times:
+                # Set only the new entries, unless a username can't be used as a field path
+                if any('.' in k or k.startswith('$') for k in new_times):
+                    update = {'entries': logged_entries}
+                else:
+                    update = {f'entries.{k}': v for k, v in new_times.items()}
+                times.update_one({'timestamp': timestamp}, {'$set': update})
+                bump_data_version(db, 'times')
                 print(
                     f"Updated document with timestamp {timestamp} with new entries")
-                new_times = {k: v for k, v in entries.items()
-                             if k not in doc_entries.keys()}
                 # manually update doc to pass along
-                existing_doc['entries'] = entries
+                doc_entries.update(new_times)
+                existing_doc['entries'] = doc_entries
                 return existing_doc, new_times
 
             else:
@@ -225,16 +194,20 @@ def post_new_times_to_discord_webhook(new_times):
 
 def post_current_standing_to_discord_webhook(times_doc):
     """
-    Posts the current standing of entries to a Discord webhook.
+    Posts the current standing of entries to a Discord webhook, editing the day's
+    standing message in place once it has been posted.
 
     Args:
-        times_doc (dict): A dictionary containing entries and their times.
+        times_doc (dict): A dictionary containing entries and their times, and the
+            'standing_message_id' and 'standing_description' of the day's message if
+            it was already posted.
 
     Raises:
-        requests.exceptions.RequestException: If the POST request to the webhook URL fails.
+        requests.exceptions.RequestException: If the request to the webhook URL fails.
 
     Returns:
-        None
+        tuple: A tuple containing the message id and the posted description, or None
+        if the standing has not changed since it was last posted.
     """
     webhook_url = os.environ.get('DISCORD_WEBHOOK')
 
@@ -249,6 +222,13 @@ def post_current_standing_to_discord_webhook(times_doc):
         description_str += f"{place}. {username} - {format_time(time)}\n"
         place += 1
 
+    message_id = times_doc.get('standing_message_id')
+
+    # Skip the request entirely if the standing is already up to date
+    if message_id and times_doc.get('standing_description') == description_str:
+        print("Current standing has not changed")
+        return None
+
     try:
         # Prepare the data to be sent to the webhook
         data = {
@@ -257,17 +237,73 @@ def post_current_standing_to_discord_webhook(times_doc):
                 'description': description_str
             }]
         }
-        # Send the POST request to the webhook URL
-        response = requests.post(webhook_url, json=data)
 
-        # Check the response status code and raise an error if it indicates a failure
-        response.raise_for_status()
+        if message_id:
+            # Edit the day's standing message in place
+            response = requests.patch(
+                get_webhook_message_url(webhook_url, message_id), json=data)
+
+            # Post a new message instead if the old one was deleted
+            if response.status_code == 404:
+                message_id = None
+            else:
+                response.raise_for_status()
+
+        if not message_id:
+            # Send the POST request to the webhook URL, waiting for the created message
+            response = requests.post(
+                webhook_url, params={'wait': 'true'}, json=data)
+
+            # Check the response status code and raise an error if it indicates a failure
+            response.raise_for_status()
+            message_id = response.json()['id']
+
+        return message_id, description_str
     except requests.exceptions.RequestException as e:
         raise e
     except Exception as e:
         raise e
 
 
+def save_standing_message(timestamp, message_id, description) -> None:
+    """
+    Stores the id and contents of the day's standing message alongside its times document.
+
+    Args:
+        timestamp (datetime): The timestamp of the times document.
+        message_id (str): The id of the Discord message showing the standing.
+        description (str): The standing that the message currently shows.
+
+    Raises:
+        ConnectionFailure: If there is failed connection to the database
+        OperationFailure: If there is a operation failed when read/write 
+
+    Returns:
+        None
+    """
+    try:
+        uri = os.environ.get('MONGO_URI')
+
+        # Create a new client and connect to the server
+        client = MongoClient(uri, server_api=ServerApi('1'))
+        db = client.get_database('nyt-mini-times-cluster')
+        times = db['times']
+
+        times.update_one({'timestamp': timestamp}, {'$set': {
+            'standing_message_id': message_id,
+            'standing_description': description
+        }})
+
+    except errors.ConnectionFailure as e:
+        raise e
+    except errors.OperationFailure as e:
+        raise e
+    except Exception as e:
+        raise e
+    finally:
+        client.close()
+
+
 def main():
 
     try:
@@ -291,7 +327,12 @@ def main():
             # If there are new entries, post them to Discord
             if new_times:
                 post_new_times_to_discord_webhook(new_times)
-                post_current_standing_to_discord_webhook(doc)
+
+            # Post or edit the day's standing if it changed
+            standing = post_current_standing_to_discord_webhook(doc)
+            if standing:
+                message_id, description = standing
+                save_standing_message(timestamp, message_id, description)
 
         # If there are no entries in the leaderboard
         else:
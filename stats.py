@@ -1,8 +1,10 @@
 import matplotlib.pyplot as plt
+from PIL import Image
 from pymongo.mongo_client import MongoClient
 from pymongo.server_api import ServerApi
 from pymongo import errors
 import requests
+import json
 import io
 import os
 
@@ -13,14 +15,115 @@ if not os.getenv('GITHUB_ACTIONS'):
     from dotenv import load_dotenv
     load_dotenv()
 
+# Resolution the charts are rendered at, lowered if a chart is over budget
+CHART_DPI = 72
+CHART_MIN_DPI = 40
 
-def post_pie_charts_to_discord_webhook():
-    try:
-        uri = os.environ.get('MONGO_URI')
+# Image format of the charts: 'png', 'palette' (palette-quantized PNG) or 'webp'
+CHART_FORMAT = 'palette'
+CHART_PALETTE_COLORS = 64
+CHART_WEBP_QUALITY = 80
 
-        # Create a new client and connect to the server
-        client = MongoClient(uri, server_api=ServerApi('1'))
-        db = client.get_database('nyt-mini-times-cluster')
+# Size budget of a single chart image in bytes
+CHART_MAX_BYTES = 200 * 1024
+
+CHART_CONTENT_TYPES = {
+    'png': ('png', 'image/png'),
+    'palette': ('png', 'image/png'),
+    'webp': ('webp', 'image/webp'),
+}
+
+
+def encode_figure(fig, dpi=CHART_DPI, image_format=CHART_FORMAT) -> bytes:
+    """
+    Encodes a Matplotlib figure as an image.
+
+    Args:
+        fig (Figure): The figure to encode.
+        dpi (int): The resolution to render the figure at.
+        image_format (str): One of 'png', 'palette' or 'webp'.
+
+    Raises:
+        ValueError: If the image format is not supported.
+
+    Returns:
+        bytes: The encoded image.
+    """
+    if image_format not in CHART_CONTENT_TYPES:
+        raise ValueError(f'Unsupported chart format {image_format}')
+
+    # Save the chart image to a BytesIO object
+    image_stream = io.BytesIO()
+    fig.savefig(image_stream, format='png', dpi=dpi)
+
+    if image_format == 'png':
+        return image_stream.getvalue()
+
+    # Re-encode the rendered chart with Pillow
+    image_stream.seek(0)
+    image = Image.open(image_stream).convert('RGB')
+    output_stream = io.BytesIO()
+
+    if image_format == 'palette':
+        # Charts only use a handful of flat colors, so a small palette is lossless enough
+        image = image.quantize(colors=CHART_PALETTE_COLORS)
+        image.save(output_stream, format='PNG', optimize=True)
+    else:
+        image.save(output_stream, format='WEBP',
+                   quality=CHART_WEBP_QUALITY, method=6)
+
+    return output_stream.getvalue()
+
+
+def save_chart(fig, name, dpi=CHART_DPI, image_format=CHART_FORMAT,
+               max_bytes=CHART_MAX_BYTES) -> tuple:
+    """
+    Encodes a chart for upload, lowering the resolution until it fits the size budget.
+
+    Args:
+        fig (Figure): The figure to encode, closed once encoded.
+        name (str): The file name of the chart without extension.
+        dpi (int): The resolution to start rendering the figure at.
+        image_format (str): One of 'png', 'palette' or 'webp'.
+        max_bytes (int): The size budget of the image in bytes.
+
+    Returns:
+        tuple: A tuple containing the file name, the encoded image and its content type.
+    """
+    extension, content_type = CHART_CONTENT_TYPES.get(
+        image_format, (None, None))
+
+    image = encode_figure(fig, dpi, image_format)
+    while len(image) > max_bytes and dpi > CHART_MIN_DPI:
+        dpi = max(CHART_MIN_DPI, int(dpi * 0.8))
+        image = encode_figure(fig, dpi, image_format)
+
+    plt.close(fig)
+
+    if len(image) > max_bytes:
+        print(
+            f'Chart {name} is {len(image)} bytes, over the {max_bytes} byte budget')
+
+    return f'{name}.{extension}', image, content_type
+
+
+def get_weekday_wins_data(db) -> tuple:
+    """
+    Counts the wins of each user on each day of the week.
+
+    Args:
+        db: the MongoDB database holding the "times" collection
+
+    Raises:
+        errors.ConnectionFailure: if there is a failure connecting to the MongoDB database
+        errors.OperationFailure: if there is an error performing the MongoDB operations
+
+    Returns:
+        data (dict): a dictionary mapping weekday names to dictionaries of usernames and wins,
+            empty if there are no times yet
+        colors (dict): a dictionary mapping usernames to the color used for them in charts
+    """
+    try:
         times_collection = db['times']
 
         # Retrieve the wins data per person per day from the collection
@@ -31,7 +134,7 @@ def post_pie_charts_to_discord_webhook():
 
         # Filter current day if needed
         prev_mini_timestamp = get_previous_nyt_mini_timestamp()
-        if all_documents[-1].get('timestamp').date() > prev_mini_timestamp:
+        if all_documents and all_documents[-1].get('timestamp').date() > prev_mini_timestamp:
             # Remove the last document from the cursor
             all_documents.pop()
 
@@ -41,6 +144,10 @@ def post_pie_charts_to_discord_webhook():
             weekday = weekdays[document['weekday']]
             entries = document['entries']
 
+            # Skip days that nobody solved
+            if not entries:
+                continue
+
             # Calculate the winner for the day based on the shortest time entry
             winner = min(entries, key=entries.get)
 
@@ -55,94 +162,86 @@ def post_pie_charts_to_discord_webhook():
             if winner not in colors:
                 colors[winner] = plt.cm.Set3(len(colors))
 
-        # Generate the combined pie chart for all weekdays
-        # Create a new figure for the combined pie chart
-        fig, axs = plt.subplots(2, 4, figsize=(12, 6))
+        return data, colors
 
-        # Calculate the total number of subplots required
-        num_subplots = len(weekdays)
+    except errors.ConnectionFailure as e:
+        raise e
+    except errors.OperationFailure as e:
+        raise e
 
-        all_usernames = []
-        all_wedges = []
 
-        for i, weekday in enumerate(weekdays):
-            # Retrieve the wins data for the current weekday
-            wins_data = data.get(weekday, {})
+def render_pie_charts(data, colors, **image_options) -> tuple:
+    """
+    Renders a pie chart of the wins of each user for every day of the week.
 
-            # Extract the usernames and wins for the current weekday
-            usernames = list(wins_data.keys())
-            wins = list(wins_data.values())
+    Args:
+        data (dict): a dictionary mapping weekday names to dictionaries of usernames and wins
+        colors (dict): a dictionary mapping usernames to the color used for them in charts
+        **image_options: Options passed along to `save_chart`.
 
-            # Create a subplot for the current weekday
-            ax = axs[i // 4, i % 4]
+    Returns:
+        tuple: A tuple containing the file name, the encoded image and its content type.
+    """
+    weekdays = ['Monday', 'Tuesday', 'Wednesday',
+                'Thursday', 'Friday', 'Saturday', 'Sunday']
 
-            # Generate the pie chart for the current weekday
-            wedges, _ = ax.pie(wins, labels=wins, labeldistance=0.75, startangle=90, colors=[
-                               colors[u] for u in usernames])
-            ax.set_title(f'{weekday}')
-            ax.axis('equal')  # Equal aspect ratio ensures circular pie chart
+    # Generate the combined pie chart for all weekdays
+    # Create a new figure for the combined pie chart
+    fig, axs = plt.subplots(2, 4, figsize=(12, 6))
 
-            # Get the wedges abd labels that will be used for the overall legend
+    # Calculate the total number of subplots required
+    num_subplots = len(weekdays)
 
-            for j, username in enumerate(usernames):
-                if username not in all_usernames:
-                    all_usernames.append(username)
-                    all_wedges.append(wedges[j])
+    all_usernames = []
+    all_wedges = []
 
-       # Remove the extra subplot if there are less than 8 weekdays
-        if num_subplots < 8:
-            axs[-1, -1].remove()
+    for i, weekday in enumerate(weekdays):
+        # Retrieve the wins data for the current weekday
+        wins_data = data.get(weekday, {})
 
-        # Adjust spacing between subplots
-        plt.tight_layout()
+        # Extract the usernames and wins for the current weekday
+        usernames = list(wins_data.keys())
+        wins = list(wins_data.values())
 
-        # Create a single legend for all the pie charts
-        plt.legend(all_wedges, all_usernames, title='Usernames',
-                   loc='center left', bbox_to_anchor=(1, 0.5))
+        # Create a subplot for the current weekday
+        ax = axs[i // 4, i % 4]
+        ax.set_title(f'{weekday}')
 
-        # Save the combined pie chart image to a BytesIO object
-        image_stream = io.BytesIO()
-        plt.savefig(image_stream, format='png')
-        plt.close()
+        # Leave the subplot empty if nobody has won on this weekday yet
+        if not wins:
+            ax.axis('off')
+            ax.text(0.5, 0.5, 'No wins yet', ha='center',
+                    va='center', transform=ax.transAxes)
+            continue
 
-        # Reset the file pointer of the stream to the beginning
-        image_stream.seek(0)
+        # Generate the pie chart for the current weekday
+        wedges, _ = ax.pie(wins, labels=wins, labeldistance=0.75, startangle=90, colors=[
+                           colors[u] for u in usernames])
+        ax.axis('equal')  # Equal aspect ratio ensures circular pie chart
 
-        # Convert the image stream to a Discord-compatible file object
-        file_obj = image_stream.getvalue()
+        # Get the wedges abd labels that will be used for the overall legend
 
-        # Create a multipart/form-data payload for sending the file
-        files = {
-            'file': ('chart.png', file_obj, 'image/png')
-        }
+        for j, username in enumerate(usernames):
+            if username not in all_usernames:
+                all_usernames.append(username)
+                all_wedges.append(wedges[j])
 
-        # Post the image to Discord webhook
-        webhook_url = os.environ.get('DISCORD_WEBHOOK')
-        payload = {
-            # 'username': 'Chart Bot',
-            # 'content': 'Check out the wins breakdown per weekday!'
-        }
-        response = requests.post(webhook_url, data=payload, files=files)
+   # Remove the extra subplot if there are less than 8 weekdays
+    if num_subplots < 8:
+        axs[-1, -1].remove()
 
-        # Check if the request was successful
-        if response.status_code == 200:
-            print('Combined pie chart image posted to Discord successfully.')
-        else:
-            print('Failed to post combined pie chart image to Discord.')
+    # Adjust spacing between subplots
+    fig.tight_layout()
 
-    except errors.ConnectionFailure as e:
-        raise e
-    except errors.OperationFailure as e:
-        raise e
+    # Create a single legend for all the pie charts
+    plt.legend(all_wedges, all_usernames, title='Usernames',
+               loc='center left', bbox_to_anchor=(1, 0.5))
 
+    return save_chart(fig, 'weekdays', **image_options)
 
-def get_wins_data():
-    try:
-        uri = os.environ.get('MONGO_URI')
 
-        # Create a new client and connect to the server
-        client = MongoClient(uri, server_api=ServerApi('1'))
-        db = client.get_database('nyt-mini-times-cluster')
+def get_wins_data(db):
+    try:
         winners_collection = db['winners']
 
         # Retrieve the username and wins data from the collection
@@ -163,46 +262,79 @@ def get_wins_data():
         raise e
     except Exception as e:
         raise e
-    finally:
-        client.close()
 
 
-def post_bar_chart_to_discord_webhook(wins, usernames):
+def render_bar_chart(wins, usernames, **image_options) -> tuple:
+    """
+    Renders a bar chart of the total wins of each user.
+
+    Args:
+        wins (list): The number of wins of each user.
+        usernames (list): The usernames, in the same order as the wins.
+        **image_options: Options passed along to `save_chart`.
+
+    Returns:
+        tuple: A tuple containing the file name, the encoded image and its content type.
+    """
     # Create a bar chart using Matplotlib
+    fig = plt.figure()
     plt.bar(usernames, wins)
     plt.ylabel('Wins')
     plt.title('Mini Crushers Total Wins')
 
-   # Save the chart image to a BytesIO object
-    image_stream = io.BytesIO()
-    plt.savefig(image_stream, format='png')
-    plt.close()
+    return save_chart(fig, 'wins', **image_options)
 
-    # Reset the file pointer of the stream to the beginning
-    image_stream.seek(0)
 
-    # Convert the image stream to a Discord-compatible file object
-    file_obj = image_stream.getvalue()
+def post_report_to_discord_webhook(data, charts):
+    """
+    Posts a message and its charts to a Discord webhook in a single multipart request.
 
-    # Create a multipart/form-data payload for sending the file
-    files = {
-        'file': ('chart.png', file_obj, 'image/png')
-    }
+    Each chart is attached to the message and shown in an embed of its own after
+    the message's embeds.
+
+    Args:
+        data (dict): The message to post, with optional 'content' and 'embeds'.
+        charts (list): A list of (file name, image, content type) tuples to attach.
+
+    Raises:
+        requests.exceptions.RequestException: If the POST request to the webhook URL fails.
 
-    # Post the image to Discord webhook
+    Returns:
+        None
+    """
     webhook_url = os.environ.get('DISCORD_WEBHOOK')
-    payload = {
-        # 'content': 'Overall Report'
+
+    # Reference every attached chart from an embed so it is shown inline
+    payload = dict(data)
+    payload['embeds'] = list(data.get('embeds', [])) + [
+        {'image': {'url': f'attachment://{filename}'}} for filename, _, _ in charts]
+    payload['attachments'] = [
+        {'id': i, 'filename': filename} for i, (filename, _, _) in enumerate(charts)]
+
+    # Create a multipart/form-data payload for sending the message and files
+    files = {
+        f'files[{i}]': chart for i, chart in enumerate(charts)
     }
-    response = requests.post(webhook_url, data=payload, files=files)
-    # Check if the request was successful
-    if response.status_code == 200:
-        print('Chart image posted to Discord successfully.')
-    else:
-        print('Failed to post chart image to Discord.')
+    files['payload_json'] = (None, json.dumps(payload), 'application/json')
+
+    response = requests.post(webhook_url, files=files)
+
+    # Check the response status code and raise an error if it indicates a failure
+    response.raise_for_status()
+    print(
+        f'Report with {len(charts)} charts posted to Discord successfully.')
 
 
 if __name__ == "__main__":
-    usernames, wins = get_wins_data()
-    post_bar_chart_to_discord_webhook(wins, usernames)
-    post_pie_charts_to_discord_webhook()
+    client = MongoClient(os.environ.get('MONGO_URI'), server_api=ServerApi('1'))
+    try:
+        db = client.get_database('nyt-mini-times-cluster')
+        usernames, wins = get_wins_data(db)
+        data, colors = get_weekday_wins_data(db)
+    finally:
+        client.close()
+
+    post_report_to_discord_webhook({}, [
+        render_bar_chart(wins, usernames),
+        render_pie_charts(data, colors),
+    ])
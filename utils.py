@@ -1,5 +1,6 @@
 import pytz
 from datetime import datetime, timedelta
+from urllib.parse import urlsplit, urlunsplit
 
 
 def format_time(seconds):
@@ -18,6 +19,23 @@ def format_time(seconds):
     return f"{minutes:02d}:{seconds:02d}"
 
 
+def get_webhook_message_url(webhook_url, message_id):
+    """
+    Builds the URL of a message sent by a Discord webhook, used to edit it.
+
+    Args:
+        webhook_url: the URL of the webhook, optionally with query parameters
+        message_id: the id of the message sent by the webhook
+
+    Returns:
+        A string with the URL of the message, keeping any query parameters
+    """
+    parts = urlsplit(webhook_url)
+    path = f"{parts.path.rstrip('/')}/messages/{message_id}"
+
+    return urlunsplit(parts._replace(path=path))
+
+
 def get_previous_nyt_mini_timestamp() -> datetime.date:
     """
     Calculates the timestamp of the previous New York Times Mini puzzle.
@@ -45,3 +63,15 @@ def get_previous_nyt_mini_timestamp() -> datetime.date:
         puzzle_date = et_time.date() - timedelta(days=1)
 
     return puzzle_date
+
+
+def get_current_nyt_mini_timestamp() -> datetime.date:
+    """
+    Calculates the timestamp of the New York Times Mini puzzle currently on the leaderboard.
+
+    Returns:
+        puzzle_date (datetime.date): A date object representing the date of the current
+            New York Times Mini puzzle.
+    """
+    # The current puzzle is always the one released after the previous puzzle
+    return get_previous_nyt_mini_timestamp() + timedelta(days=1)
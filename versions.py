@@ -0,0 +1,33 @@
+# Collection holding the counters bumped on every write to the data
+DATA_VERSION_COLLECTION = 'meta'
+DATA_VERSION_ID = 'data_version'
+
+
+def bump_data_version(db, collection) -> None:
+    """
+    Records that a collection was written to, invalidating anything cached from it.
+
+    Args:
+        db (Database): The MongoDB database that was written to.
+        collection (str): The name of the collection that changed, 'times' or 'winners'.
+
+    Returns:
+        None
+    """
+    db[DATA_VERSION_COLLECTION].update_one(
+        {'_id': DATA_VERSION_ID}, {'$inc': {collection: 1}}, upsert=True)
+
+
+def get_data_version(db) -> str:
+    """
+    Retrieves a string that changes whenever the `times` or `winners` collections do.
+
+    Args:
+        db (Database): The MongoDB database to read the counters from.
+
+    Returns:
+        str: The current version of the data.
+    """
+    doc = db[DATA_VERSION_COLLECTION].find_one({'_id': DATA_VERSION_ID}) or {}
+
+    return f"{doc.get('times', 0)}.{doc.get('winners', 0)}"